@@ -1,52 +1,142 @@
+from collections import defaultdict, deque
 from prettytable import PrettyTable
 
+EPSILON = "\u03b5"
+
 class FiniteAutomaton:
     def __init__(self):
         self.states = set()
         self.alphabet = set()
         self.start_state = set()
         self.accept_states = set()
-        self.transitions = {}
+        self.transitions = defaultdict(lambda: defaultdict(set))
+        # Integer ids of states and symbols, used by the hot loops of determinize
+        self._state_id = {}
+        self._state_names = []
+        self._sym_id = {}
+        self._sym_names = []
+        self._trans = None
+        self._eclosure = None
+        # Set on the automata built by determinize: each transition then maps to a single state name, not a set
+        self._is_dfa_storage = False
+        # Predicate results, each stored with the version of the automaton it was computed for.
+        # Only the add_* and set_* methods bump the version: states, start_state, accept_states and transitions
+        # must not be changed directly, or the cached results go stale
+        self._version = 0
+        self._pred_cache = {}
+
+    def _cached_predicate(self, name, compute):
+        version, result = self._pred_cache.get(name, (-1, None))
+        if version != self._version:
+            result = compute()
+            self._pred_cache[name] = (self._version, result)
+        return result
+
+    def _intern_state(self, state):
+        state_id = self._state_id.get(state)
+        if state_id is None:
+            state_id = self._state_id[state] = len(self._state_names)
+            self._state_names.append(state)
+            self._trans = None
+            self._eclosure = None
+        return state_id
+
+    def _intern_symbol(self, symbol):
+        sym_id = self._sym_id.get(symbol)
+        if sym_id is None:
+            sym_id = self._sym_id[symbol] = len(self._sym_names)
+            self._sym_names.append(symbol)
+            self._trans = None
+        return sym_id
 
     def add_state(self, state):
         self.states.add(state)
+        self._version += 1
+        self._intern_state(state)
 
     def add_symbol(self, symbol):
+        if symbol in ("Îµ", "ε"):
+            symbol = EPSILON
         self.alphabet.add(symbol)
+        self._version += 1
+        self._intern_symbol(symbol)
 
     def add_start_state(self, start_state):
         self.start_state.add(start_state)
+        self._version += 1
+        self._intern_state(start_state)
+
+    def set_start_state(self, start_state):
+        # Replace all the start states by a single one
+        self.start_state = {start_state}
+        self._version += 1
+        self._intern_state(start_state)
 
     def add_accept_state(self, accept_state):
         self.accept_states.add(accept_state)
+        self._version += 1
+        self._intern_state(accept_state)
 
     def add_transition(self, from_state, symbol, to_state):
-        if from_state not in self.transitions:
-            self.transitions[from_state] = {}
-        if symbol not in self.transitions[from_state]:
-            self.transitions[from_state][symbol] = set()
-        self.transitions[from_state][symbol].add(to_state)
+        if symbol in ("Îµ", "ε"):
+            symbol = EPSILON
+        if self._is_dfa_storage:
+            next_state = self.transitions[from_state].get(symbol)
+            # An empty set left by an indexed read of a missing edge counts as no transition
+            if not next_state or next_state == to_state:
+                self.transitions[from_state][symbol] = to_state
+            else:
+                # A second destination: go back to sets of states, the automaton being no longer deterministic
+                self._to_set_storage()
+                self.transitions[from_state][symbol].add(to_state)
+        else:
+            self.transitions[from_state][symbol].add(to_state)
+        self._version += 1
+        self._intern_state(from_state)
+        self._intern_state(to_state)
+        self._intern_symbol(symbol)
+        self._trans = None
+        self._eclosure = None
+
+    def _to_set_storage(self):
+        for transitions in self.transitions.values():
+            for symbol, next_state in transitions.items():
+                if isinstance(next_state, str):
+                    transitions[symbol] = {next_state}
+        self._is_dfa_storage = False
+
+    def _transition_table(self):
+        # Build the table [state id][symbol id] -> tuple of destination state ids
+        if self._trans is None:
+            trans = [[() for _ in self._sym_names] for _ in self._state_names]
+            for from_state, transitions in self.transitions.items():
+                row = trans[self._state_id[from_state]]
+                for symbol, next_states in transitions.items():
+                    row[self._sym_id[symbol]] = tuple(self._state_id[state] for state in _destinations(next_states))
+            self._trans = trans
+        return self._trans
 
     def to_truth_table(self):
+        symbols = sorted(self.alphabet)
+        states = sorted(self.states)
+
         table = PrettyTable()
-        table.field_names = ["State"] + sorted(self.alphabet)
-        table.field_names = [s.replace("Îµ", "ε") for s in table.field_names]
-
-        for state in sorted(self.states):
-            if state in self.start_state and state in self.accept_states:
-                row = ["<--> " + state]
-            elif state in self.accept_states:
-                row = ["<-- " + state]
-            elif state in self.start_state:
-                row = ["--> " + state]
-            else:
-                row = [state]
+        table.field_names = ["State"] + symbols
+
+        # Arrows marking the start (-->) and accept (<--) states
+        prefix = {
+            state: "<--> " if state in self.start_state and state in self.accept_states
+            else "<-- " if state in self.accept_states
+            else "--> " if state in self.start_state
+            else ""
+            for state in states
+        }
+
+        rows = []
+        for state in states:
             transitions = self.transitions.get(state, {})
-            for symbol in sorted(self.alphabet):
-                next_states = transitions.get(symbol, "-")
-                row.append(" ".join(next_states) if next_states != "-" else "-")
-
-            table.add_row(row)
+            rows.append([prefix[state] + state] + [" ".join(_destinations(transitions.get(symbol, ()))) or "-" for symbol in symbols])
+        table.add_rows(rows)
 
         return table
     
@@ -57,15 +147,14 @@ class FiniteAutomaton:
         sink_state = "p"
         fa.add_state(sink_state)
 
-        for state in fa.states:
-            transitions = fa.transitions.get(state, {})
-            for symbol in fa.alphabet:
-                if symbol not in transitions:
-                    fa.add_transition(state, symbol, sink_state)
-
+        # The sink state loops on every symbol, the other states go to it on their missing symbols
         for symbol in fa.alphabet:
             fa.add_transition(sink_state, symbol, sink_state)
 
+        for state in list(fa.states):
+            for symbol in fa.alphabet - fa.transitions.get(state, {}).keys():
+                fa.add_transition(state, symbol, sink_state)
+
         return fa
     
 
@@ -75,7 +164,7 @@ class FiniteAutomaton:
             next_states = set()
             for state in current_states:
                 transitions = self.transitions.get(state, {})
-                next_states.update(transitions.get(symbol, []))
+                next_states.update(_destinations(transitions.get(symbol, ())))
             current_states = next_states
 
         # Check if any of the final states are reached after processing the word
@@ -93,42 +182,72 @@ class FiniteAutomaton:
         for start_state in fa.start_state:
             transitions = fa.transitions.get(start_state, {})
             for symbol, next_states in transitions.items():
-                for next_state in next_states:
+                for next_state in _destinations(next_states):
                     fa.add_transition(new_start_state, symbol, next_state)
 
         # Mettre à jour l'état initial pour être le nouvel état initial
-        fa.start_state = {new_start_state}
+        fa.set_start_state(new_start_state)
 
         return fa
     
 
     def epsilon_closure(self, state):
-        closure = {state}  # Include the initial state in the closure
-        stack = [state]    # Initialize a stack with the initial state
-
-        # Perform depth-first search to find all states reachable via epsilon transitions
-        while stack:
-            current_state = stack.pop()
-            transitions = self.transitions.get(current_state, {})
-            epsilon_transitions = transitions.get('Îµ', set())  # Retrieve epsilon transitions
-            for next_state in epsilon_transitions:
-                if next_state not in closure:
-                    closure.add(next_state)
-                    stack.append(next_state)
-
-        return closure
+        if state not in self._state_id:
+            return {state}
+        if self._eclosure is None:
+            self._compute_all_eclosures()
+        return self._bits_to_states(self._eclosure[self._state_id[state]])
+
+    def _bits_to_states(self, bits):
+        # Decode a bitset of state ids into the set of state names, isolating the lowest set bit each time
+        states = set()
+        while bits:
+            low = bits & -bits
+            states.add(self._state_names[low.bit_length() - 1])
+            bits ^= low
+        return states
+
+    def _compute_all_eclosures(self):
+        # Compute the epsilon closure of every state id as a bitset (bit j set if state j is in the closure)
+        trans = self._transition_table()
+        eps_id = self._sym_id.get(EPSILON)
+
+        # Bit j of eps_succ_bits[i] is set if there is an epsilon transition from state i to state j
+        eps_succ_bits = []
+        for row in trans:
+            bits = 0
+            if eps_id is not None:
+                for next_id in row[eps_id]:
+                    bits |= 1 << next_id
+            eps_succ_bits.append(bits)
+
+        # Propagate each closure to a fixed point, reusing the closures already computed
+        eclosure = []
+        for state_id in range(len(trans)):
+            closure = frontier = 1 << state_id
+            while frontier:
+                reached = 0
+                while frontier:
+                    low = frontier & -frontier
+                    current_id = low.bit_length() - 1
+                    reached |= eclosure[current_id] if current_id < state_id else eps_succ_bits[current_id]
+                    frontier ^= low
+                frontier = reached & ~closure
+                closure |= frontier
+            eclosure.append(closure)
+        self._eclosure = eclosure
 
     
     def is_deterministic(self):
-        for state, transitions in self.transitions.items():
-            # Vérifier s'il y a plus d'une transition pour un symbole
-            for symbol in self.alphabet:
-                if symbol in transitions and len(transitions[symbol]) > 1:
-                    return False
-            # Vérifier s'il y a une transition vide
-            if 'Îµ' in transitions:
-                return False
-        return True
+        return self._cached_predicate("is_deterministic", self._check_deterministic)
+
+    def _check_deterministic(self):
+        alphabet = self.alphabet
+        # Au plus une transition par symbole, et aucune transition vide
+        return all(
+            EPSILON not in transitions and all(len(_destinations(transitions.get(symbol, ()))) <= 1 for symbol in alphabet)
+            for transitions in self.transitions.values()
+        )
 
 
     def determinize(self):
@@ -137,54 +256,75 @@ class FiniteAutomaton:
 
         new_fa = FiniteAutomaton()
 
+        # Work on state and symbol ids rather than names, sets of states being bitsets
+        trans = self._transition_table()
+        # Accept states as a bitset, a state without an id being reachable from no subset
+        accept_bits = 0
+        for state in self.accept_states:
+            if state in self._state_id:
+                accept_bits |= 1 << self._state_id[state]
+
         # Compute epsilon closures for all states
-        epsilon_closures = {}
-        for state in self.states:
-            epsilon_closures[state] = self.epsilon_closure(state)
-
-        # Compute epsilon closure of start state
-        start_closure = self.epsilon_closure(next(iter(self.start_state)))
-
-        # Initialize variables for the determinization process
-        state_mapping = {frozenset(start_closure): 'q0'}
-        queue = [frozenset(start_closure)]
-        visited = set()
-
-        while queue:
-            current_states = queue.pop(0)
-            visited.add(current_states)
-
-            # Check if the current set of states is an accept state
-            if any(state in self.accept_states for state in current_states):
-                new_fa.add_accept_state(state_mapping[current_states])
-
-            for symbol in self.alphabet:
-                next_states = set()
-                for state in current_states:
-                    transitions = self.transitions.get(state, {})
-                    if symbol in transitions:
-                        next_states.update(transitions[symbol])  # Exclude epsilon transitions
-
-                # Compute the epsilon closure of the next states
-                next_states_epsilon = set()
-                for state in next_states:
-                    next_states_epsilon.update(epsilon_closures[state])
-
-                if next_states_epsilon:
-                    next_state_frozen = frozenset(next_states_epsilon)
-                    if next_state_frozen not in state_mapping:
-                        new_state_name = f'q{len(state_mapping)}'
-                        state_mapping[next_state_frozen] = new_state_name
-                        queue.append(next_state_frozen)
-                        new_fa.add_state(new_state_name)
-                        if any(state in self.accept_states for state in next_state_frozen):
-                            new_fa.add_accept_state(new_state_name)
-
-                    new_fa.add_transition(state_mapping[current_states], symbol, state_mapping[next_state_frozen])
-
-        # Set the start state of the new automaton
+        if self._eclosure is None:
+            self._compute_all_eclosures()
+        epsilon_closures = self._eclosure
+
+        # Successors of each state on each symbol, already closed under epsilon transitions
+        trans_bits = []
+        for row in trans:
+            row_bits = []
+            for next_ids in row:
+                bits = 0
+                for next_id in next_ids:
+                    bits |= epsilon_closures[next_id]
+                row_bits.append(bits)
+            trans_bits.append(row_bits)
+
+        # Compute epsilon closure of the start states, all of them being included
+        start_closure = 0
+        for start_state in self.start_state:
+            start_closure |= epsilon_closures[self._state_id[start_state]]
+
+        # Run the subset construction on integers only, epsilon transitions being already folded into the closures
+        # Symbols are sorted so that the subsets, and hence the q0, q1, ... names, are found in a reproducible order
+        symbols = sorted(symbol for symbol in self.alphabet if symbol != EPSILON)
+        new_trans, new_accepts = _subset_construction(
+            trans_bits, [self._sym_id[symbol] for symbol in symbols], start_closure, accept_bits
+        )
+
+        # Rebuild the new automaton from the returned tables, subset i being named qi
+        # Missing transitions (empty subsets) go to a sink state, so that the result is already complete
+        names = [f'q{i}' for i in range(len(new_trans))]
+        sink_state = "p"
+        needs_sink = any(next_index < 0 for row in new_trans for next_index in row)
+        for symbol in symbols:
+            new_fa.add_symbol(symbol)
+        for name, accepting in zip(names, new_accepts):
+            new_fa.add_state(name)
+            if accepting:
+                new_fa.add_accept_state(name)
+        if needs_sink:
+            new_fa.add_state(sink_state)
         new_fa.add_start_state('q0')
 
+        # Every state and symbol is interned, so the single destinations are written directly
+        new_fa._is_dfa_storage = True
+        new_transitions = new_fa.transitions
+        for name, row in zip(names, new_trans):
+            transitions = new_transitions[name]
+            for symbol, next_index in zip(symbols, row):
+                transitions[symbol] = names[next_index] if next_index >= 0 else sink_state
+        if needs_sink:
+            transitions = new_transitions[sink_state]
+            for symbol in symbols:
+                transitions[symbol] = sink_state
+        new_fa._trans = None
+        new_fa._version += 1
+
+        # The subset construction gives a deterministic, complete and standard automaton
+        for name in ("is_deterministic", "is_complete", "is_standard"):
+            new_fa._pred_cache[name] = (new_fa._version, True)
+
         return new_fa
 
 
@@ -192,15 +332,20 @@ class FiniteAutomaton:
 
 
     def is_complete(self):
+        return self._cached_predicate("is_complete", self._check_complete)
+
+    def _check_complete(self):
+        alphabet = self.alphabet
         for state in self.states:
-            if state not in self.transitions:
+            transitions = self.transitions.get(state)
+            if transitions is None or not transitions.keys() >= alphabet:
                 return False
-            for symbol in self.alphabet:
-                if symbol not in self.transitions[state]:
-                    return False
         return True
 
     def is_standard(self):
+        return self._cached_predicate("is_standard", self._check_standard)
+
+    def _check_standard(self):
         return len(self.start_state) == 1
             
 
@@ -215,34 +360,79 @@ class FiniteAutomaton:
         return " ".join(fa_type) if fa_type else "not recognized"
 
 
+def _destinations(next_states):
+    # Transitions of automata built by determinize hold a single state name, the others a set of names
+    return (next_states,) if isinstance(next_states, str) else next_states
+
+
+def _subset_construction(trans_bits, symbol_ids, start_bits, accept_bits):
+    # Kernel of determinize, on integers only: sets of states are bitsets and trans_bits[state id][symbol id]
+    # is the epsilon-closed successor set. Subsets are numbered in discovery order, starting subset being 0.
+    # Returns, for each subset, the index of its successor on each symbol of symbol_ids (-1 if there is none),
+    # and whether it is accepting.
+    subset_index = {start_bits: 0}
+    queue = deque([start_bits])
+    new_trans = []
+    new_accepts = []
+
+    while queue:
+        current_states = queue.popleft()
+        new_accepts.append(current_states & accept_bits != 0)
+
+        row = []
+        for symbol_id in symbol_ids:
+            # Union of the successors of the current states, iterating over the set bits
+            next_states = 0
+            bits = current_states
+            while bits:
+                low = bits & -bits
+                next_states |= trans_bits[low.bit_length() - 1][symbol_id]
+                bits ^= low
+
+            if next_states:
+                next_index = subset_index.get(next_states)
+                if next_index is None:
+                    next_index = subset_index[next_states] = len(subset_index)
+                    queue.append(next_states)
+                row.append(next_index)
+            else:
+                row.append(-1)
+        new_trans.append(row)
+
+    return new_trans, new_accepts
+
+
+# Method of FiniteAutomaton called on each value of the header lines of an automaton file
+_HEADER_METHODS = {
+    "States": "add_state",
+    "Alphabet": "add_symbol",
+    "Start": "add_start_state",
+    "Accept": "add_accept_state",
+}
+
+
 def read_fa_from_file(filename):
     fa = FiniteAutomaton()
+    add_transition = fa.add_transition
     try:
-        with open(filename, "r") as file:
+        with open(filename, "r", encoding="utf-8") as file:
             for line in file:
-                line = line.strip()
-                if line.startswith("States:"):
-                    states = line[7:].strip().split()
-                    for state in states:
-                        fa.add_state(state)
-                elif line.startswith("Alphabet:"):
-                    alphabet = line[9:].strip().split()
-                    for symbol in alphabet:
-                        fa.add_symbol(symbol)
-                elif line.startswith("Start:"):
-                    start_state = line[6:].strip().split()
-                    for state in start_state:
-                        fa.add_start_state(state)
-                elif line.startswith("Accept:"):
-                    accept_states = line[7:].strip().split()
-                    for state in accept_states:
-                        fa.add_accept_state(state)
-                elif line.startswith("Transitions:"):
+                head, sep, rest = line.partition(":")
+                if not sep:
+                    continue
+                head = head.strip()
+                method = _HEADER_METHODS.get(head)
+                if method is not None:
+                    add = getattr(fa, method)
+                    for value in rest.split():
+                        add(value)
+                elif head == "Transitions":
                     for line in file:
-                        if line.strip() == "":
+                        fields = line.split()
+                        if not fields:
                             break
-                        from_state, symbol, to_state = line.strip().split()
-                        fa.add_transition(from_state, symbol, to_state)
+                        from_state, symbol, to_state = fields
+                        add_transition(from_state, symbol, to_state)
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
     return fa
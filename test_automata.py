@@ -0,0 +1,28 @@
+from Automata import read_fa_from_file
+
+
+def test_standardize_after_adding_start_state_to_determinized_automaton():
+    d = read_fa_from_file("fa.txt").standardize().complete().determinize()
+    expected = {symbol: {d.transitions["q0"][symbol], d.transitions["q1"][symbol]} for symbol in d.alphabet}
+
+    d.add_start_state("q1")
+    d.standardize()
+
+    assert d.start_state == {"i"}
+    assert {symbol: d.transitions["i"][symbol] for symbol in d.alphabet} == expected
+    assert not d.is_deterministic()
+    assert all(isinstance(next_states, set) for transitions in d.transitions.values() for next_states in transitions.values())
+
+
+def test_add_transition_after_reading_missing_edge_of_determinized_automaton():
+    d = read_fa_from_file("fa.txt").determinize()
+    d.add_state("x")
+    d.transitions["x"]["a"]
+    d.add_transition("x", "a", "q0")
+    assert d.transitions["x"]["a"] == "q0"
+
+    d.transitions["x"]["b"]
+    d.add_transition("x", "a", "q1")
+    assert d.transitions["x"]["a"] == {"q0", "q1"}
+    assert d.transitions["x"]["b"] == set()
+    assert not d._is_dfa_storage